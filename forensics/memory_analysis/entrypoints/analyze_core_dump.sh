@@ -131,18 +131,17 @@ for i in $(seq 0 $((VALUE_COUNT - 1))); do
     echo ""
 done
 
-# Analyze hardcoded patterns (block search)
-for i in $(seq 0 $((PATTERN_COUNT - 1))); do
-    PATTERN_HEX="${PATTERNS[$i]}"
-    echo "[*] Analyzing Pattern #$((i + 1)): 0x${PATTERN_HEX} (contiguous block search)..."
-    python3 forensics/memory_analysis/scripts/analyze_pattern.py "$CORE_FILE" "$PATTERN_HEX"
+# Analyze hardcoded patterns (block search, one pass over the dump for all patterns)
+if [ $PATTERN_COUNT -gt 0 ]; then
+    echo "[*] Analyzing $PATTERN_COUNT patterns: ${PATTERNS[*]} (contiguous block search)..."
+    python3 forensics/memory_analysis/scripts/analyze_pattern.py "$CORE_FILE" "${PATTERNS[@]}"
     RESULT=$?
     if [ $RESULT -eq 1 ]; then
         TRACE_DETECTED=1
-        echo "[!] TRACE FOUND in Pattern #$((i + 1))"
+        echo "[!] TRACE FOUND in hardcoded patterns"
     fi
     echo ""
-done
+fi
 
 # Cleanup
 rm -f /tmp/master_key.hex
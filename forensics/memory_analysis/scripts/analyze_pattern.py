@@ -3,54 +3,110 @@
 
 import sys
 
+try:
+    import numpy as np
+except ImportError:  # fall back to the mmap.find scanner
+    np = None
+
+from dump_advice import map_dump
+
+SCAN_WINDOW = 64 * 1024  # bytes inspected per step when extending a run
+TILE = 4 * 1024 * 1024  # bytes compared against every pattern while cache-resident (multiple of 8)
+
+
+def _find_blocks_vectorized(data, byte_values, min_length):
+    """Find blocks of every byte value in a single tiled pass over the buffer."""
+    arr = np.frombuffer(data, dtype=np.uint8)
+    blocks = {v: [] for v in byte_values}
+    carry = dict.fromkeys(byte_values)  # start of a run still open at the tile edge
+
+    # A long-enough run that ends inside a tile fully covers at least `stride`
+    # consecutive aligned 8-byte words, so it always covers one of every
+    # stride-th word; tiles where no sampled word is the byte repeated 8 times
+    # can be skipped (one uint64 compare checks 8 bytes at once)
+    stride = (min_length - 7) // 8
+
+    seen = np.ones(256, dtype=bool)  # byte values with a sampled run in the tile
+
+    for base in range(0, len(arr), TILE):
+        tile = arr[base:base + TILE]
+        if stride > 0:
+            # Keep the sampled words that are one byte repeated 8 times and mark
+            # their byte in a 256-entry table, so every pattern is checked with
+            # one lookup instead of one compare pass per pattern
+            samples = tile[:len(tile) // 8 * 8].view(np.uint64)[::stride]
+            low = samples & np.uint64(0xFF)
+            seen[:] = False
+            seen[low[samples == low * np.uint64(0x0101010101010101)]] = True
+
+        for v in blocks:
+            # Runs crossing either tile edge still need the full compare
+            if carry[v] is None and tile[-1] != v and not seen[v]:
+                continue
+
+            eq = tile == v
+
+            # Boolean diff (XOR) marks every run edge; edges alternate start,
+            # end, start, ... so a single nonzero pass over a bool array finds
+            # both (offsets are tile-relative until the blocks are kept)
+            edges = np.flatnonzero(np.diff(eq, prepend=False, append=False))
+            starts, ends = edges[0::2], edges[1::2]
+
+            # Stitch the run left open by the previous tile
+            if carry[v] is not None:
+                if eq[0]:
+                    starts[0] = carry[v] - base
+                elif base - carry[v] >= min_length:
+                    blocks[v].append((carry[v], base - carry[v]))
+                carry[v] = None
+
+            if eq[-1]:
+                carry[v] = base + int(starts[-1])
+                starts, ends = starts[:-1], ends[:-1]
+
+            lengths = ends - starts
+            keep = lengths >= min_length
+            blocks[v].extend(zip((starts[keep] + base).tolist(), lengths[keep].tolist()))
+
+    # Handle blocks at end
+    for v, start in carry.items():
+        if start is not None and len(arr) - start >= min_length:
+            blocks[v].append((start, len(arr) - start))
 
-def find_blocks(dump_path, byte_value, min_length=16):
-    """Find contiguous blocks of a specific byte value."""
-    blocks = []
-
-    with open(dump_path, "rb") as f:
-        data = f.read()
-
-    start = None
-    length = 0
+    return blocks
 
-    for i, b in enumerate(data):
-        if b == byte_value:
-            if start is None:
-                start = i
-            length += 1
-        else:
-            if start is not None and length >= min_length:
-                blocks.append((start, length))
-            start = None
-            length = 0
 
-    # Handle block at end
-    if start is not None and length >= min_length:
-        blocks.append((start, length))
+def _find_blocks_jump(data, byte_value, min_length):
+    """Find blocks by jumping between candidate runs with find (memchr/memmem)."""
+    blocks = []
+    byte = bytes([byte_value])
+    needle = byte * max(min_length, 1)
+
+    # Any hit of `needle` after a mismatch is the start of a long-enough run
+    start = data.find(needle)
+    while start != -1:
+        end = start + len(needle)
+        while True:
+            window = data[end:end + SCAN_WINDOW]
+            run = len(window) - len(window.lstrip(byte))
+            end += run
+            if run < SCAN_WINDOW:
+                break
+        blocks.append((start, end - start))
+        start = data.find(needle, end)
 
     return blocks
 
 
-def main():
-    if len(sys.argv) != 3:
-        print(f"Usage: {sys.argv[0]} <core_dump_path> <pattern_hex>")
-        print(f"Example: {sys.argv[0]} core.dump aa")
-        sys.exit(1)
-
-    dump_path = sys.argv[1]
-    pattern_hex = sys.argv[2]
-
-    # Parse hex pattern (e.g., "aa", "41", "cc")
-    try:
-        byte_value = int(pattern_hex, 16)
-    except ValueError:
-        print(f"Error: Invalid hex pattern '{pattern_hex}'")
-        sys.exit(1)
+def find_all_blocks(data, byte_values, min_length=16):
+    """Find contiguous blocks of each byte value in a bytes-like buffer, keyed by value."""
+    if np is not None:
+        return _find_blocks_vectorized(data, byte_values, min_length)
+    return {v: _find_blocks_jump(data, v, min_length) for v in byte_values}
 
-    # Find contiguous blocks (minimum 64 bytes)
-    blocks = find_blocks(dump_path, byte_value, min_length=64)
 
+def report_blocks(pattern_hex, blocks):
+    """Print the blocks found for a single pattern."""
     print(f"\n{'=' * 60}")
     print(f"Pattern: 0x{pattern_hex.upper()}")
     print(f"{'=' * 60}")
@@ -63,8 +119,43 @@ def main():
         for i, (offset, length) in enumerate(blocks, 1):
             print(f"  Block {i}: offset=0x{offset:08x}, size={length:4d} bytes")
 
+
+def main():
+    if len(sys.argv) < 3:
+        print(f"Usage: {sys.argv[0]} <core_dump_path> <pattern_hex> [<pattern_hex> ...]")
+        print(f"Example: {sys.argv[0]} core.dump aa cc")
+        sys.exit(1)
+
+    dump_path = sys.argv[1]
+
+    # Parse hex patterns (e.g., "aa", "41", "cc")
+    patterns = []
+    for pattern_hex in sys.argv[2:]:
+        try:
+            byte_value = int(pattern_hex, 16)
+            # Blocks are runs of a single byte, so anything wider is not a pattern
+            if not 0 <= byte_value <= 0xFF:
+                raise ValueError(pattern_hex)
+            patterns.append((pattern_hex, byte_value))
+        except ValueError:
+            print(f"Error: Invalid hex pattern '{pattern_hex}'")
+            sys.exit(1)
+
+    trace_found = False
+
+    # Map the dump once and find contiguous blocks (minimum 64 bytes) of
+    # every pattern in a single pass over it
+    byte_values = [v for _, v in patterns]
+    with map_dump(dump_path) as data:
+        all_blocks = find_all_blocks(data, byte_values, min_length=64)
+
+    for pattern_hex, byte_value in patterns:
+        blocks = all_blocks[byte_value]
+        report_blocks(pattern_hex, blocks)
+        trace_found = trace_found or bool(blocks)
+
     # Exit code: 0 if no traces, 1 if traces found
-    sys.exit(1 if blocks else 0)
+    sys.exit(1 if trace_found else 0)
 
 
 if __name__ == "__main__":
@@ -9,10 +9,15 @@ For multi-byte values (u16, u32, u64), searches both big-endian and little-endia
 byte orders since the value may be stored differently depending on architecture.
 """
 
+import mmap
+import os
 import sys
-import re
+from concurrent.futures import ProcessPoolExecutor
 
-CHUNK = 1024 * 1024 * 16  # 16 MiB
+from dump_advice import map_dump
+
+PARALLEL_MIN_SIZE = 64 * 1024 * 1024  # below this, worker startup outweighs the split
+SCAN_WINDOW = 64 * 1024 * 1024  # bytes tallied for every pattern before moving on
 MAX_LINES = 200           # avoid spam; adjust if needed
 REPORT_EVERY = 1          # 1 = report every prefix; can increase (e.g., 2, 4, 8)
 
@@ -28,72 +33,121 @@ def read_pattern_hex(path: str) -> bytes:
     s = s.lower()
     if s.startswith("0x"):
         s = s[2:]
-    s = re.sub(r"\s+", "", s)
+    s = "".join(s.split())
 
     if len(s) == 0 or (len(s) % 2) != 0:
         raise SystemExit(f"Invalid hex length in {path}: {len(s)}")
 
-    if not re.fullmatch(r"[0-9a-f]+", s):
+    try:
+        return bytes.fromhex(s)
+    except ValueError:
         raise SystemExit(f"Invalid hex characters in {path}")
 
-    return bytes.fromhex(s)
-
 def detect_type(size: int) -> str:
     """Detect integer type from byte size."""
     return INT_SIZES.get(size, f"{size}-byte value")
 
-def count_occurrences(path: str, needle: bytes, chunk: int) -> int:
-    """Count occurrences of needle in file, handling chunk overlaps."""
-    if not needle:
-        return 0
-
-    overlap = len(needle) - 1
-    tail = b""
-    count = 0
-
-    with open(path, "rb") as f:
-        while True:
-            b = f.read(chunk)
-            if not b:
-                break
-
-            data = tail + b
-
-            start = 0
-            while True:
-                i = data.find(needle, start)
-                if i == -1:
-                    break
-                count += 1
-                start = i + 1
-
-            tail = data[-overlap:] if overlap > 0 else b""
-
-    return count
-
-def search_pattern(core_path: str, pattern: bytes, label: str) -> bool:
-    """Search for pattern with progressive prefix detection. Returns True if trace found."""
+def tally_prefixes(data, pattern: bytes, start: int, end: int, longest: list) -> None:
+    """Extend every hit of pattern[0] in [start, end) to its longest matching prefix."""
+    k = len(pattern)
+    first = pattern[:1]
+
+    i = data.find(first, start, end)
+    while i != -1:
+        m = 1
+        while m < k and i + m < len(data) and data[i + m] == pattern[m]:
+            m += 1
+        longest[m] += 1
+        i = data.find(first, i + 1, end)
+
+def tally_range(data, patterns: list, start: int, end: int) -> list:
+    """Tally longest-prefix histograms for hits starting in [start, end).
+
+    The range is walked once in SCAN_WINDOW steps, tallying every pattern on a
+    window while it is still in the page cache. A hit near the end of a window
+    extends into the next one, so no overlap is needed.
+    """
+    longest = [[0] * (len(p) + 1) for p in patterns]  # longest[m]: hits whose longest match is m
+
+    for window_start in range(start, end, SCAN_WINDOW):
+        window_end = min(window_start + SCAN_WINDOW, end)
+        for pattern, hist in zip(patterns, longest):
+            if pattern:
+                tally_prefixes(data, pattern, window_start, window_end, hist)
+
+    return longest
+
+def tally_range_in_file(path: str, patterns: list, start: int, end: int) -> list:
+    """Worker entry point: map the dump and tally one range of it."""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return tally_range(mm, patterns, start, end)
+
+def prefix_counts(hist: list) -> list:
+    """Turn a longest-prefix histogram into per-prefix occurrence counts."""
+    counts = [0] * len(hist)
+    total = 0
+    for m in range(len(hist) - 1, 0, -1):
+        total += hist[m]
+        counts[m] = total
+    return counts
+
+def count_prefix_occurrences(data, patterns: list) -> list:
+    """Count occurrences of every prefix of each pattern in a single pass over data.
+
+    Every occurrence of a prefix starts with an occurrence of pattern[0], so each
+    hit of that byte is extended once to its longest matching prefix. Returns one
+    counts list per pattern, where counts[n] is the number of occurrences of pattern[:n].
+    """
+    return [prefix_counts(hist) for hist in tally_range(data, patterns, 0, len(data))]
+
+def count_prefix_occurrences_parallel(path: str, size: int, patterns: list, workers: int) -> list:
+    """Like count_prefix_occurrences, but splits the dump into ranges across processes.
+
+    Each worker maps the dump read-only (sharing the page cache) and only tallies
+    hits that start inside its range, so no occurrence is counted twice.
+    """
+    step = -(-size // workers)
+    totals = [[0] * (len(p) + 1) for p in patterns]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(tally_range_in_file, path, patterns, start, min(start + step, size))
+            for start in range(0, size, step)
+        ]
+        for future in futures:
+            for total, hist in zip(totals, future.result()):
+                for m, c in enumerate(hist):
+                    total[m] += c
+
+    return [prefix_counts(hist) for hist in totals]
+
+def search_pattern(pattern: bytes, counts: list, label: str) -> bool:
+    """Report progressive prefix counts for pattern. Returns True if trace found."""
     print(f"[*] Searching {label}: {pattern.hex()}")
     print()
 
     lines = 0
     prev = None
     trace_found = False
+    view = memoryview(pattern)  # prefixes are O(1) views, not new bytes objects
 
     for n in range(1, len(pattern) + 1):
         if (n % REPORT_EVERY) != 0 and n != len(pattern):
             continue
 
-        pref = pattern[:n]
-        c = count_occurrences(core_path, pref, CHUNK)
+        c = counts[n]
 
-        pref_hex = pref.hex()
+        pref_hex = view[:n].hex()
         print(f"  [{n:02d}/{len(pattern)}] prefix={pref_hex}  occurrences={c}")
 
         # Detect when occurrences drop to 0
         if prev is not None and prev != 0 and c == 0:
             print(f"      -> Dropped to 0 at prefix length {n} ({n*8} bits)")
 
+        # Every longer prefix contains this one, so none of them can occur either
+        if c == 0:
+            break
+
         # Check if full pattern is found
         if n == len(pattern) and c > 0:
             trace_found = True
@@ -131,12 +185,22 @@ def main():
     trace_be = False
     trace_le = False
 
+    # Count both byte orders in one pass (skip little-endian if same, e.g., single byte)
+    patterns = [pattern_be] if pattern_be == pattern_le else [pattern_be, pattern_le]
+    workers = os.cpu_count() or 1
+    with map_dump(core_path) as data:
+        size = len(data)
+        if workers > 1 and size >= PARALLEL_MIN_SIZE:
+            counts = count_prefix_occurrences_parallel(core_path, size, patterns, workers)
+        else:
+            counts = count_prefix_occurrences(data, patterns)
+
     # Search big-endian
-    trace_be = search_pattern(core_path, pattern_be, "big-endian")
+    trace_be = search_pattern(pattern_be, counts[0], "big-endian")
 
-    # Search little-endian (skip if same as big-endian, e.g., single byte)
+    # Search little-endian
     if pattern_be != pattern_le:
-        trace_le = search_pattern(core_path, pattern_le, "little-endian")
+        trace_le = search_pattern(pattern_le, counts[1], "little-endian")
 
     # Report results
     if trace_be or trace_le:
@@ -0,0 +1,42 @@
+"""Core dump mapping and kernel read-ahead hints shared by the dump scanners."""
+
+import mmap
+import os
+from contextlib import contextmanager
+
+
+def physical_memory():
+    """Return installed RAM in bytes, or 0 if it cannot be determined."""
+    try:
+        return os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return 0
+
+
+def advise_sequential(f, mm):
+    """Hint the kernel that the dump will be read front to back."""
+    if hasattr(os, "posix_fadvise"):
+        os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+    # madvise takes one advice value per call, not a bitmask
+    advice = ["MADV_SEQUENTIAL"]
+    # Prefetching a dump larger than RAM would evict its head before the scan
+    # reaches it; rely on sequential read-ahead alone in that case
+    if len(mm) <= physical_memory():
+        advice.append("MADV_WILLNEED")
+    for name in advice:
+        if hasattr(mmap, name):
+            mm.madvise(getattr(mmap, name))
+
+
+@contextmanager
+def map_dump(path):
+    """Map a dump read-only for a front-to-back scan; an empty file yields b""."""
+    with open(path, "rb") as f:
+        # mmap rejects empty files; there is nothing to scan in them anyway
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b""
+            return
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            advise_sequential(f, mm)
+            yield mm
@@ -1,86 +1,125 @@
 #!/usr/bin/env python3
-"""Check for missing license headers in all commits."""
+"""Check for missing license headers in all commits.
 
+Usage:
+    ./scripts/check_all_commits_headers.py             # one worker per CPU (at most 16)
+    ./scripts/check_all_commits_headers.py --jobs 4    # explicit worker count
+    ./scripts/check_all_commits_headers.py --since v1  # only commits not reachable from v1
+"""
+
+import os
+import re
 import subprocess
+import sys
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import threading
 
-EXTENSIONS = [".rs", ".S"]
+from git_objects import close_cat_files, get_cat_file, get_commits_by_tree, get_option
+
+EXTENSIONS = (".rs", ".S")  # tuple so str.endswith checks them all in one call
 SKIP_PATTERNS = ["/.private/", "/.git/", "/target/", ".private/", ".git/", "target/"]
+SKIP_RE = re.compile("|".join(map(re.escape, SKIP_PATTERNS)))  # any pattern as a substring
+# Each worker drives its own git cat-file process, so more workers than CPUs only contend
+DEFAULT_JOBS = min(16, os.cpu_count() or 1)
 
 
-def get_all_commits():
-    """Get all commit hashes."""
-    cmd = ["git", "rev-list", "--all"]
-    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-    return result.stdout.splitlines()
+def parse_jobs(argv):
+    """Parse the worker count from `--jobs N`, defaulting to DEFAULT_JOBS."""
+    value = get_option(argv, "--jobs")
+    if value is None:
+        return DEFAULT_JOBS
+
+    try:
+        jobs = int(value)
+    except ValueError:
+        print(f"Error: '{value}' is not a valid number")
+        sys.exit(1)
+
+    if jobs < 1:
+        print("Error: --jobs must be >= 1")
+        sys.exit(1)
 
+    return jobs
 
-def get_files_in_commit(commit):
-    """Get all .rs and .S files in a specific commit."""
-    cmd = ["git", "ls-tree", "-r", "--name-only", commit]
+
+def get_files_in_tree(tree):
+    """Get all .rs and .S files in a tree as (path, blob sha) pairs."""
+    cmd = ["git", "ls-tree", "-r", tree]
     result = subprocess.run(cmd, capture_output=True, text=True, check=True)
 
     files = []
     for line in result.stdout.splitlines():
-        if any(line.endswith(ext) for ext in EXTENSIONS):
-            if not any(x in line for x in SKIP_PATTERNS):
-                files.append(line)
+        meta, path = line.split("\t", 1)
+        _, kind, sha = meta.split()
+        if kind != "blob":
+            continue
+        if path.endswith(EXTENSIONS) and not SKIP_RE.search(path):
+            files.append((path, sha))
     return files
 
 
-def check_file_header(commit, filepath):
-    """Check if file has Copyright header in specific commit."""
-    cmd = ["git", "show", f"{commit}:{filepath}"]
-    result = subprocess.run(
-        cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
-    )
+# Header check result per blob sha; a file unchanged across commits keeps its blob,
+# so each distinct version is read once. Racing threads at worst read a blob twice.
+_header_cache = {}
+
+
+def check_file_header(sha):
+    """Check if a file blob has a Copyright header."""
+    if sha in _header_cache:
+        return _header_cache[sha]
 
-    if result.returncode != 0:
-        return None
+    first_line = get_cat_file().first_line(sha)
+    has_header = None if first_line is None else b"Copyright" in first_line
 
-    first_line = result.stdout.split("\n")[0] if result.stdout else ""
-    return "Copyright" in first_line
+    _header_cache[sha] = has_header
+    return has_header
 
 
-def process_commit(commit):
-    """Process a single commit and return violations."""
+def process_tree(tree):
+    """Process a single tree and return the files missing a header."""
     violations = []
-    files = get_files_in_commit(commit)
+    files = get_files_in_tree(tree)
 
-    for filepath in files:
-        has_header = check_file_header(commit, filepath)
+    for filepath, sha in files:
+        has_header = check_file_header(sha)
         if has_header is False:
-            violations.append((filepath, commit[:7]))
+            violations.append(filepath)
 
     return violations
 
 
 if __name__ == "__main__":
+    jobs = parse_jobs(sys.argv)
+    since = get_option(sys.argv, "--since")
+
     print("Getting all commits...")
-    commits = get_all_commits()
-    total = len(commits)
-    print(f"Found {total} commits")
+    trees = get_commits_by_tree(since)
+    total = len(trees)
+    print(f"Found {sum(map(len, trees.values()))} commits ({total} distinct trees)")
 
     violations = {}
     completed = 0
     lock = threading.Lock()
 
-    print("\nChecking all files in all commits (parallel)...")
+    print(f"\nChecking all files in all commits ({jobs} workers)...")
 
-    with ThreadPoolExecutor(max_workers=16) as executor:
-        futures = {executor.submit(process_commit, c): c for c in commits}
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = {executor.submit(process_tree, t): t for t in trees}
 
         for future in as_completed(futures):
             with lock:
                 completed += 1
                 if completed % 5 == 0:
-                    print(f"  Progress: {completed}/{total} commits")
+                    print(f"  Progress: {completed}/{total} trees")
 
-            for filepath, short_hash in future.result():
+            # Every commit with this tree has the same violations
+            short_hashes = [c[:7] for c in trees[futures[future]]]
+            for filepath in future.result():
                 if filepath not in violations:
                     violations[filepath] = []
-                violations[filepath].append(short_hash)
+                violations[filepath].extend(short_hashes)
+
+    close_cat_files()
 
     if violations:
         print(
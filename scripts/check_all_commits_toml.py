@@ -1,70 +1,81 @@
 #!/usr/bin/env python3
-"""Check for license consistency in Cargo.toml across all commits."""
+"""Check for license consistency in Cargo.toml across all commits.
+
+Usage:
+    ./scripts/check_all_commits_toml.py               # all commits
+    ./scripts/check_all_commits_toml.py --since v1    # only commits not reachable from v1
+"""
 
 import subprocess
+import sys
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import threading
 import re
 
+from git_objects import close_cat_files, get_cat_file, get_commits_by_tree, get_option
 
-def get_all_commits():
-    """Get all commit hashes."""
-    cmd = ["git", "rev-list", "--all"]
-    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-    return result.stdout.splitlines()
+LICENSE_WORKSPACE_RE = re.compile(r'license\.workspace\s*=\s*true')
 
 
-def get_file_content(commit, filepath):
-    """Get file content at specific commit."""
-    cmd = ["git", "show", f"{commit}:{filepath}"]
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    if result.returncode != 0:
+def get_blob_content(sha):
+    """Get the text of a blob by its object id."""
+    content = get_cat_file().read(sha)
+    if content is None:
         return None
-    return result.stdout
+    return content.decode("utf-8", errors="replace")
 
 
-def get_crate_cargo_tomls(commit):
-    """Get all Cargo.toml files in crates/*/ for a commit."""
-    cmd = ["git", "ls-tree", "-r", "--name-only", commit]
+def get_cargo_tomls(tree):
+    """Get the root Cargo.toml blob and all crates/*/Cargo.toml (path, blob) pairs in one ls-tree."""
+    cmd = ["git", "ls-tree", "-r", tree]
     result = subprocess.run(cmd, capture_output=True, text=True, check=True)
 
-    files = []
+    root_sha = None
+    crate_tomls = []
     for line in result.stdout.splitlines():
-        if line.startswith("crates/") and line.endswith("Cargo.toml"):
-            files.append(line)
-    return files
-
-
-def process_commit(commit):
-    """Process a single commit and return violations."""
+        meta, path = line.split("\t", 1)
+        _, kind, sha = meta.split()
+        if kind != "blob":
+            continue
+        if path == "Cargo.toml":
+            root_sha = sha
+        elif path.startswith("crates/") and path.endswith("Cargo.toml"):
+            crate_tomls.append((path, sha))
+    return root_sha, crate_tomls
+
+
+def process_tree(tree):
+    """Process a single tree and return (filepath, reason) violations."""
     violations = []
+    root_sha, crate_tomls = get_cargo_tomls(tree)
 
     # Check root Cargo.toml has GPL-3.0-only
-    root_content = get_file_content(commit, "Cargo.toml")
+    root_content = get_blob_content(root_sha) if root_sha else None
     if root_content:
         if 'license' in root_content:
             if 'GPL-3.0-only' not in root_content:
-                violations.append(("Cargo.toml", "missing GPL-3.0-only", commit[:7]))
+                violations.append(("Cargo.toml", "missing GPL-3.0-only"))
 
     # Check crates/*/Cargo.toml have license.workspace = true
-    crate_tomls = get_crate_cargo_tomls(commit)
-    for filepath in crate_tomls:
-        content = get_file_content(commit, filepath)
+    for filepath, sha in crate_tomls:
+        content = get_blob_content(sha)
         if content:
-            has_license_workspace = re.search(r'license\.workspace\s*=\s*true', content)
+            has_license_workspace = LICENSE_WORKSPACE_RE.search(content)
             has_any_license = 'license' in content.lower()
 
             if has_any_license and not has_license_workspace:
-                violations.append((filepath, "missing license.workspace = true", commit[:7]))
+                violations.append((filepath, "missing license.workspace = true"))
 
     return violations
 
 
 if __name__ == "__main__":
+    since = get_option(sys.argv, "--since")
+
     print("Getting all commits...")
-    commits = get_all_commits()
-    total = len(commits)
-    print(f"Found {total} commits")
+    trees = get_commits_by_tree(since)
+    total = len(trees)
+    print(f"Found {sum(map(len, trees.values()))} commits ({total} distinct trees)")
 
     violations = {}
     completed = 0
@@ -73,19 +84,22 @@ if __name__ == "__main__":
     print("\nChecking license consistency in all commits (parallel)...")
 
     with ThreadPoolExecutor(max_workers=16) as executor:
-        futures = {executor.submit(process_commit, c): c for c in commits}
+        futures = {executor.submit(process_tree, t): t for t in trees}
 
         for future in as_completed(futures):
             with lock:
                 completed += 1
                 if completed % 5 == 0:
-                    print(f"  Progress: {completed}/{total} commits")
+                    print(f"  Progress: {completed}/{total} trees")
 
-            for filepath, reason, short_hash in future.result():
-                key = (filepath, reason)
+            # Every commit with this tree has the same violations
+            short_hashes = [c[:7] for c in trees[futures[future]]]
+            for key in future.result():
                 if key not in violations:
                     violations[key] = []
-                violations[key].append(short_hash)
+                violations[key].extend(short_hashes)
+
+    close_cat_files()
 
     if violations:
         print(f"\n❌ Found {len(violations)} license issues in some commits:\n")
@@ -12,12 +12,16 @@ Usage:
 
 Output goes to: scripts/asm/xchacha20poly1305/{x86,arm}/
 
-Requires: cargo-asm (cargo install cargo-asm)
+The crate is compiled once per target with --emit=asm and the listing is
+split into one file per function.
+
+Requires: the Rust targets (rustup target add x86_64-unknown-linux-gnu aarch64-unknown-linux-gnu)
 """
 
 import subprocess
 import sys
 import re
+import tempfile
 from pathlib import Path
 
 SCRIPT_DIR = Path(__file__).parent
@@ -33,6 +37,48 @@ NC = "\033[0m"
 X86_TARGET = "x86_64-unknown-linux-gnu"
 ARM_TARGET = "aarch64-unknown-linux-gnu"
 
+# One function in an ELF assembly listing: from `.type sym,@function` to `.size sym, ...`
+FUNCTION_RE = re.compile(r"^\s*\.type\s+(\S+),\s*@function\n(.*?^\s*\.size\s+\1,[^\n]*)", re.MULTILINE | re.DOTALL)
+
+# Legacy Rust symbol mangling (_ZN<len><ident>...E), its trailing hash and escapes
+MANGLED_IDENT_RE = re.compile(r"(\d+)")
+SYMBOL_HASH_RE = re.compile(r"h[0-9a-f]{16}")
+SYMBOL_ESCAPE_RE = re.compile(r"\$(LT|GT|LP|RP|SP|RF|BP|C|u[0-9a-f]+)\$")
+SYMBOL_ESCAPES = {"LT": "<", "GT": ">", "LP": "(", "RP": ")", "SP": "@", "RF": "&", "BP": "*", "C": ","}
+
+# Function path -> filename: one translate pass, then anything else unsafe becomes _
+FILENAME_TRANSLATION = str.maketrans({"<": None, ">": None, " ": "_"})
+FILENAME_UNSAFE_RE = re.compile(r"[^\w_.-]")
+
+
+def stack_op_pattern(mnemonics: str, dst_ref: str, src_ref: str) -> re.Pattern:
+    """Compile one scan for `<mnemonic> <dst>, <src>` lines touching the stack.
+
+    Groups 1-2 hold the (base, offset) of a stack destination (store) and
+    groups 3-4 those of a stack source (load). The destination runs up to the
+    first comma and is checked first; lines referencing neither side still
+    match (with no groups set) so each line yields at most one operation.
+    """
+    return re.compile(
+        rf"\b(?:{mnemonics})\b[^\S\n]+"
+        rf"(?:[^,\n]*?{dst_ref}[^,\n]*,[^\n]*?\S"
+        rf"|[^,\n]+,[^\n]*?{src_ref}"
+        rf"|[^,\n]+,[^\n]*?\S)[^\n]*",
+        re.IGNORECASE,
+    )
+
+
+# Stack slot references, e.g. [rsp + 16] and [sp, #16] (spaces never span lines)
+X86_STACK_REF = r"\[[^\S\n]*(rsp|rbp)(?:[^\S\n]*\+[^\S\n]*(\d+))?[^\S\n]*\]"
+ARM_STACK_REF = r"\[[^\S\n]*(sp|x29)(?:,[^\S\n]*#?(\d+))?[^\S\n]*\]"
+# An ARM destination stops at the first comma, so it can only be a bare [sp]
+ARM_STACK_DST_REF = r"\[[^\S\n]*(sp|x29)()[^\S\n]*\]"
+
+STACK_OPS = {
+    "x86": stack_op_pattern(r"mov(?:aps|dqa|dqu|ups)?|lea", X86_STACK_REF, X86_STACK_REF),
+    "arm": stack_op_pattern(r"str|ldr|stp|ldp|stur|ldur", ARM_STACK_DST_REF, ARM_STACK_REF),
+}
+
 
 def extract_body(asm_content: str, arch: str) -> str:
     """Extract function body, excluding prologue and epilogue."""
@@ -81,40 +127,10 @@ def extract_body(asm_content: str, arch: str) -> str:
 
 def analyze_stack_ops(body: str, arch: str) -> tuple[set, list, list]:
     """Analyze stack operations, returning (slots, stores, loads)."""
-    if arch == "x86":
-        pattern = re.compile(
-            r"\b(mov(?:aps|dqa|dqu|ups)?|lea)\b\s+([^,]+),\s*([^\n]+)",
-            re.IGNORECASE
-        )
-        stack_ref = re.compile(r"\[\s*(rsp|rbp)(?:\s*\+\s*(\d+))?\s*\]", re.IGNORECASE)
-    else:
-        pattern = re.compile(
-            r"\b(str|ldr|stp|ldp|stur|ldur)\b\s+([^,]+),\s*([^\n]+)",
-            re.IGNORECASE
-        )
-        stack_ref = re.compile(r"\[\s*(sp|x29)(?:,\s*#?(\d+))?\s*\]", re.IGNORECASE)
-
-    stores = []
-    loads = []
-
-    for line in body.splitlines():
-        s = line.strip()
-        m = pattern.search(s)
-        if not m:
-            continue
-
-        dst = m.group(2)
-        src = m.group(3)
+    matches = list(STACK_OPS[arch].finditer(body))
 
-        dst_match = stack_ref.search(dst)
-        src_match = stack_ref.search(src)
-
-        if dst_match:
-            base, off = dst_match.group(1), int(dst_match.group(2) or 0)
-            stores.append((base, off))
-        elif src_match:
-            base, off = src_match.group(1), int(src_match.group(2) or 0)
-            loads.append((base, off))
+    stores = [(m[1], int(m[2] or 0)) for m in matches if m[1]]
+    loads = [(m[3], int(m[4] or 0)) for m in matches if m[3]]
 
     slots = set(stores + loads)
     return slots, stores, loads
@@ -133,40 +149,89 @@ def count_spills(asm_content: str, arch: str) -> tuple[int, int, int]:
 
 def sanitize_filename(func_path: str) -> str:
     """Convert function path to safe filename."""
-    # Remove < and >
-    name = func_path.replace("<", "").replace(">", "")
+    # Remove < and >, replace spaces (first, so that ":<:" still collapses to "::")
+    name = func_path.translate(FILENAME_TRANSLATION)
     # Replace :: with _
     name = name.replace("::", "_")
-    # Replace spaces
-    name = name.replace(" ", "_")
     # Remove any other problematic chars
-    name = re.sub(r'[^\w_.-]', '_', name)
-    return name
+    return FILENAME_UNSAFE_RE.sub("_", name)
+
+
+def demangle(symbol: str) -> str:
+    """Demangle a legacy Rust symbol without its hash; other symbols are returned as-is."""
+    if not symbol.startswith("_ZN"):
+        return symbol
+
+    idents = []
+    pos = 3
+    while pos < len(symbol) and symbol[pos] != "E":
+        match = MANGLED_IDENT_RE.match(symbol, pos)
+        if not match:
+            return symbol
+        pos = match.end() + int(match.group(1))
+        idents.append(symbol[match.end():pos])
+
+    if idents and SYMBOL_HASH_RE.fullmatch(idents[-1]):
+        idents.pop()
+
+    def unescape(ident: str) -> str:
+        if ident.startswith("_$"):
+            ident = ident[1:]
+        ident = ident.replace("..", "::")
+        return SYMBOL_ESCAPE_RE.sub(
+            lambda m: SYMBOL_ESCAPES.get(m.group(1)) or chr(int(m.group(1)[1:], 16)),
+            ident,
+        )
 
+    return "::".join(unescape(ident) for ident in idents)
+
+
+def emit_asm(target: str, arch: str) -> str | None:
+    """Compile redoubt-aead once and return its whole assembly listing, or None on failure."""
+    with tempfile.TemporaryDirectory() as tmp:
+        asm_file = Path(tmp) / "redoubt_aead.s"
+        cmd = [
+            "cargo", "rustc", "--release", "--lib", "-p", "redoubt-aead", "--target", target,
+            "--", f"--emit=asm={asm_file}", "-C", "codegen-units=1",
+        ]
+        if arch == "x86":
+            cmd += ["-C", "llvm-args=-x86-asm-syntax=intel"]
+
+        result = subprocess.run(cmd, capture_output=True, text=True, cwd=PROJECT_ROOT)
+        if result.returncode != 0 or not asm_file.exists():
+            print(result.stderr, end="")
+            return None
+
+        return asm_file.read_text()
+
+
+def trim_function(asm: str) -> str:
+    """Cut a function listing after its last instruction (drops .Lfunc_end labels and .size)."""
+    lines = asm.rstrip("\n").split("\n")
+    while lines:
+        stripped = lines[-1].strip()
+        if stripped and not stripped.startswith(".") and not stripped.endswith(":"):
+            break
+        lines.pop()
+    return "\n".join(lines) + "\n"
 
-def get_xchacha_functions(target: str) -> list[tuple[int, str]]:
-    """Get list of xchacha20poly1305 functions from cargo-asm."""
-    result = subprocess.run(
-        ["cargo", "asm", "--lib", "-p", "redoubt-aead", "--target", target],
-        capture_output=True,
-        text=True,
-        cwd=PROJECT_ROOT,
-    )
 
-    functions = []
-    for line in result.stdout.split("\n"):
-        # Match lines like: 36 "redoubt_aead::xchacha20poly1305::..." [135]
-        match = re.match(r'\s*(\d+)\s+"([^"]+)"', line)
-        if match and "xchacha20poly1305" in match.group(2):
-            idx = int(match.group(1))
-            func_path = match.group(2)
-            functions.append((idx, func_path))
+def get_xchacha_functions(asm: str) -> list[tuple[int, str, str]]:
+    """Split an assembly listing into (index, function path, asm) for xchacha20poly1305 functions."""
+    functions = sorted(
+        (demangle(match.group(1)), trim_function(match.group(2)))
+        for match in FUNCTION_RE.finditer(asm)
+    )
 
-    return functions
+    return [
+        (idx, func_path, body)
+        for idx, (func_path, body) in enumerate(functions)
+        if "xchacha20poly1305" in func_path
+    ]
 
 
-def gen_func_asm(idx: int, func_path: str, target: str, arch: str, out_dir: Path) -> None:
-    """Generate assembly for a single function."""
+def gen_func_asm(idx: int, func_path: str, asm_content: str, arch: str, out_dir: Path) -> None:
+    """Write the assembly of a single function and report its stack usage."""
     filename = sanitize_filename(func_path) + ".s"
     out_file = out_dir / filename
 
@@ -174,18 +239,6 @@ def gen_func_asm(idx: int, func_path: str, target: str, arch: str, out_dir: Path
     short_name = func_path.split("::")[-1][:40]
     print(f"  [{idx}] {short_name}: ", end="", flush=True)
 
-    result = subprocess.run(
-        ["cargo", "asm", "--lib", "-p", "redoubt-aead", "--target", target, str(idx)],
-        capture_output=True,
-        text=True,
-        cwd=PROJECT_ROOT,
-    )
-
-    if result.returncode != 0:
-        print(f"{YELLOW}failed{NC}")
-        return
-
-    asm_content = result.stdout
     out_file.write_text(asm_content)
 
     slots, stores, loads = count_spills(asm_content, arch)
@@ -200,9 +253,14 @@ def gen_func_asm(idx: int, func_path: str, target: str, arch: str, out_dir: Path
 
 def gen_arch(arch: str, target: str) -> None:
     """Generate assembly for all xchacha functions for a given architecture."""
-    print(f"Fetching xchacha20poly1305 functions for {arch.upper()}...")
+    print(f"Compiling xchacha20poly1305 functions for {arch.upper()}...")
+
+    asm = emit_asm(target, arch)
+    if asm is None:
+        print(f"{YELLOW}failed{NC}")
+        return
 
-    functions = get_xchacha_functions(target)
+    functions = get_xchacha_functions(asm)
     print(f"Found {len(functions)} functions\n")
 
     if not functions:
@@ -212,8 +270,8 @@ def gen_arch(arch: str, target: str) -> None:
     out_dir = ASM_DIR / arch
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    for idx, func_path in functions:
-        gen_func_asm(idx, func_path, target, arch, out_dir)
+    for idx, func_path, asm_content in functions:
+        gen_func_asm(idx, func_path, asm_content, arch, out_dir)
 
 
 def main():
@@ -9,6 +9,7 @@ Usage:
 import json
 import os
 import urllib.request
+from concurrent.futures import ThreadPoolExecutor
 
 # Configuration for multiple test vector sources
 TEST_CONFIGS = [
@@ -122,7 +123,8 @@ def map_flags(flags, flag_map):
     """Convert JSON flags array to Rust vec! macro."""
     if not flags:
         return "vec![]"
-    rust_flags = [flag_map.get(f, f"/* unknown: {f} */") for f in flags]
+    get = flag_map.get  # bound once, not per flag
+    rust_flags = [get(f) or f"/* unknown: {f} */" for f in flags]
     return f"vec![{', '.join(rust_flags)}]"
 
 
@@ -143,6 +145,45 @@ COPYRIGHT_HEADER = [
     "",
 ]
 
+# One TestCase literal per template, formatted and appended as a single block
+AEAD_TEST_CASE = """\
+        TestCase {{
+            tc_id: {tc_id},
+            comment: "{comment}".into(),
+            flags: {flags},
+            key: "{key}".into(),
+            iv: "{iv}".into(),
+            aad: "{aad}".into(),
+            msg: "{msg}".into(),
+            ct: "{ct}".into(),
+            tag: "{tag}".into(),
+            result: {result},
+        }},"""
+
+HKDF_TEST_CASE = """\
+        TestCase {{
+            tc_id: {tc_id},
+            comment: "{comment}".into(),
+            flags: {flags},
+            ikm: "{ikm}".into(),
+            salt: "{salt}".into(),
+            info: "{info}".into(),
+            size: {size},
+            okm: "{okm}".into(),
+            result: {result},
+        }},"""
+
+MAC_TEST_CASE = """\
+        TestCase {{
+            tc_id: {tc_id},
+            comment: "{comment}".into(),
+            flags: {flags},
+            key: "{key}".into(),
+            msg: "{msg}".into(),
+            tag: "{tag}".into(),
+            result: {result},
+        }},"""
+
 
 def generate_aead_rust(data, source_url):
     """Generate Rust source code from Wycheproof AEAD JSON."""
@@ -185,18 +226,10 @@ def generate_aead_rust(data, source_url):
             tag = test.get("tag", "")
             result = map_result(test.get("result", ""))
 
-            lines.append("        TestCase {")
-            lines.append(f"            tc_id: {tc_id},")
-            lines.append(f'            comment: "{comment}".into(),')
-            lines.append(f"            flags: {flags},")
-            lines.append(f'            key: "{key}".into(),')
-            lines.append(f'            iv: "{iv}".into(),')
-            lines.append(f'            aad: "{aad}".into(),')
-            lines.append(f'            msg: "{msg}".into(),')
-            lines.append(f'            ct: "{ct}".into(),')
-            lines.append(f'            tag: "{tag}".into(),')
-            lines.append(f"            result: {result},")
-            lines.append("        },")
+            lines.append(AEAD_TEST_CASE.format(
+                tc_id=tc_id, comment=comment, flags=flags, key=key, iv=iv,
+                aad=aad, msg=msg, ct=ct, tag=tag, result=result,
+            ))
 
     lines.append("    ]")
     lines.append("}")
@@ -245,17 +278,10 @@ def generate_hkdf_rust(data, source_url):
             okm = test.get("okm", "")
             result = map_result(test.get("result", ""))
 
-            lines.append("        TestCase {")
-            lines.append(f"            tc_id: {tc_id},")
-            lines.append(f'            comment: "{comment}".into(),')
-            lines.append(f"            flags: {flags},")
-            lines.append(f'            ikm: "{ikm}".into(),')
-            lines.append(f'            salt: "{salt}".into(),')
-            lines.append(f'            info: "{info}".into(),')
-            lines.append(f"            size: {size},")
-            lines.append(f'            okm: "{okm}".into(),')
-            lines.append(f"            result: {result},")
-            lines.append("        },")
+            lines.append(HKDF_TEST_CASE.format(
+                tc_id=tc_id, comment=comment, flags=flags, ikm=ikm, salt=salt,
+                info=info, size=size, okm=okm, result=result,
+            ))
 
     lines.append("    ]")
     lines.append("}")
@@ -298,15 +324,10 @@ def generate_mac_rust(data, source_url):
             tag = test.get("tag", "")
             result = map_result(test.get("result", ""))
 
-            lines.append("        TestCase {")
-            lines.append(f"            tc_id: {tc_id},")
-            lines.append(f'            comment: "{comment}".into(),')
-            lines.append(f"            flags: {flags},")
-            lines.append(f'            key: "{key}".into(),')
-            lines.append(f'            msg: "{msg}".into(),')
-            lines.append(f'            tag: "{tag}".into(),')
-            lines.append(f"            result: {result},")
-            lines.append("        },")
+            lines.append(MAC_TEST_CASE.format(
+                tc_id=tc_id, comment=comment, flags=flags, key=key, msg=msg,
+                tag=tag, result=result,
+            ))
 
     lines.append("    ]")
     lines.append("}")
@@ -316,34 +337,42 @@ def generate_mac_rust(data, source_url):
 
 
 def main():
-    for config in TEST_CONFIGS:
-        print(f"\n=== Processing {config['name']} ===")
-        print(f"Fetching from {config['url']}...")
-
-        try:
-            data = fetch_json(config["url"])
-        except Exception as e:
-            print(f"ERROR: Failed to fetch {config['name']}: {e}")
-            continue
-
-        print(f"Generating Rust code...")
-
-        if config["type"] == "hkdf":
-            rust_code = generate_hkdf_rust(data, config["url"])
-        elif config["type"] == "mac":
-            rust_code = generate_mac_rust(data, config["url"])
-        else:
-            rust_code = generate_aead_rust(data, config["url"])
-
-        # Ensure output directory exists
-        output_path = config["output"]
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-
-        with open(output_path, "w") as f:
-            f.write(rust_code)
-
-        num_tests = data.get("numberOfTests", "?")
-        print(f"Written {num_tests} test vectors to {output_path}")
+    # Start every download up front; code generation stays on this thread, in order
+    with ThreadPoolExecutor(max_workers=len(TEST_CONFIGS)) as executor:
+        downloads = [executor.submit(fetch_json, config["url"]) for config in TEST_CONFIGS]
+
+        for config, download in zip(TEST_CONFIGS, downloads):
+            print(f"\n=== Processing {config['name']} ===")
+            print(f"Fetching from {config['url']}...")
+
+            try:
+                data = download.result()
+            except Exception as e:
+                print(f"ERROR: Failed to fetch {config['name']}: {e}")
+                continue
+
+            print(f"Generating Rust code...")
+
+            if config["type"] == "hkdf":
+                rust_code = generate_hkdf_rust(data, config["url"])
+            elif config["type"] == "mac":
+                rust_code = generate_mac_rust(data, config["url"])
+            else:
+                rust_code = generate_aead_rust(data, config["url"])
+
+            # Ensure output directory exists
+            output_path = config["output"]
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+            # Write next to the target and rename over it, so an interrupted run
+            # never leaves a half-written vectors file behind
+            tmp_path = f"{output_path}.tmp"
+            with open(tmp_path, "w") as f:
+                f.write(rust_code)
+            os.replace(tmp_path, output_path)
+
+            num_tests = data.get("numberOfTests", "?")
+            print(f"Written {num_tests} test vectors to {output_path}")
 
     print("\n✓ All test vectors generated successfully")
 
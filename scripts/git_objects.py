@@ -0,0 +1,102 @@
+"""Helpers shared by the check_all_commits_* scripts for walking git history."""
+
+import subprocess
+import sys
+import threading
+
+SKIP_CHUNK = 64 * 1024  # read size when discarding object bodies past the first line
+
+
+def get_option(argv, flag):
+    """Return the value following flag in argv, or None if flag is absent."""
+    if flag not in argv:
+        return None
+
+    index = argv.index(flag) + 1
+    if index >= len(argv):
+        print(f"Error: {flag} needs a value")
+        sys.exit(1)
+
+    return argv[index]
+
+
+def get_commits_by_tree(since=None):
+    """Get all commit hashes grouped by root tree (commits sharing a tree have the same files)."""
+    cmd = ["git", "rev-list", "--all", "--no-commit-header", "--format=%H %T"]
+    if since:
+        cmd += ["--not", since]
+    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+
+    trees = {}
+    for line in result.stdout.splitlines():
+        commit, tree = line.split()
+        trees.setdefault(tree, []).append(commit)
+    return trees
+
+
+class CatFile:
+    """Long-lived `git cat-file --batch` process for reading many objects."""
+
+    def __init__(self):
+        self.proc = subprocess.Popen(
+            ["git", "cat-file", "--batch"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+
+    def _request(self, ref):
+        """Ask for an object and return its size, or None if it does not exist."""
+        self.proc.stdin.write(f"{ref}\n".encode())
+        self.proc.stdin.flush()
+
+        header = self.proc.stdout.readline()
+        if header.endswith(b" missing\n"):
+            return None
+        return int(header.split()[2])
+
+    def read(self, ref):
+        """Return the contents of an object, or None if it does not exist."""
+        size = self._request(ref)
+        if size is None:
+            return None
+        return self.proc.stdout.read(size + 1)[:-1]  # drop the trailing LF
+
+    def first_line(self, ref):
+        """Return the first line of an object (without LF), or None if it does not exist."""
+        size = self._request(ref)
+        if size is None:
+            return None
+
+        line = self.proc.stdout.readline(size)
+
+        # Skip the rest of the object and its trailing LF without buffering it whole
+        remaining = size - len(line) + 1
+        while remaining > 0:
+            remaining -= len(self.proc.stdout.read(min(remaining, SKIP_CHUNK)))
+
+        return line.rstrip(b"\n")
+
+    def close(self):
+        self.proc.stdin.close()
+        self.proc.wait()
+
+
+_local = threading.local()
+_cat_files = []
+_cat_files_lock = threading.Lock()
+
+
+def get_cat_file():
+    """Get this thread's cat-file process, starting it on first use."""
+    if not hasattr(_local, "cat_file"):
+        _local.cat_file = CatFile()
+        with _cat_files_lock:
+            _cat_files.append(_local.cat_file)
+    return _local.cat_file
+
+
+def close_cat_files():
+    """Shut down the cat-file processes started by every thread."""
+    with _cat_files_lock:
+        while _cat_files:
+            _cat_files.pop().close()
@@ -26,37 +26,68 @@ LICENSE_PATTERNS = [
     ),
 ]
 
+# What add_header produces for an already-stamped file: the header, then one blank line
+STAMPED_PREFIX = HEADER_TEMPLATE + "\n"
+
+
+def may_have_license(content: str) -> bool:
+    """Cheap pre-check: False means no LICENSE_PATTERNS can match content."""
+    # Every pattern needs "Copyright" in some case. Only "copyr" is checked because
+    # IGNORECASE also lets the "i" match Turkish İ/ı, which lower() does not map to "i".
+    return "copyr" in content.lower()
+
 
 def remove_existing_headers(content: str) -> str:
     """Remove any existing license headers from content."""
+    if not may_have_license(content):
+        return content
+
     for pattern in LICENSE_PATTERNS:
         content = pattern.sub("", content)
     return content
 
 
+def has_current_header(content: str) -> bool:
+    """Return True if add_header would leave this Rust source unchanged."""
+    if not content.startswith(STAMPED_PREFIX):
+        return False
+
+    # A blank line or a "// ..." comment right after the header would be folded into it
+    body = content[len(STAMPED_PREFIX):]
+    if body[:1] in ("", "\n") or body.startswith("// "):
+        return False
+
+    return not may_have_license(body)
+
+
 def add_header(content: str, file_ext: str) -> str:
     """Add license header to content if not present."""
+    # Already-stamped files are the common case; skip the rewrite entirely
+    if file_ext == ".rs" and has_current_header(content):
+        return content
+
     # Remove existing headers first (idempotent)
     content = remove_existing_headers(content)
 
     if file_ext == ".rs":
         # For Rust files, add header before any content
         # But after shebang if present
-        lines = content.split("\n")
-        insert_pos = 0
+        prefix = ""
 
         # Skip shebang
-        if lines and lines[0].startswith("#!"):
-            insert_pos = 1
-
-        # Remove leading empty lines after insert position
-        while insert_pos < len(lines) and lines[insert_pos] == "":
-            lines.pop(insert_pos)
-
-        # Insert header
-        header_lines = HEADER_TEMPLATE.strip().split("\n")
-        result_lines = lines[:insert_pos] + header_lines + [""] + lines[insert_pos:]
-        return "\n".join(result_lines)
+        if content.startswith("#!"):
+            end = content.find("\n")
+            if end == -1:
+                prefix, content = content + "\n", ""
+            else:
+                prefix, content = content[:end + 1], content[end + 1:]
+
+        # Drop leading empty lines after insert position
+        body = content.lstrip("\n")
+
+        # Insert header, separated from the body by one blank line
+        header = HEADER_TEMPLATE.strip() + "\n"
+        return prefix + header + ("\n" + body if body else "")
 
     return content
 
@@ -8,24 +8,111 @@ Project insights: generates INSIGHTS.md with code metrics and coverage.
 No external dependencies - stdlib only.
 
 Reads coverage from coverage/report.html (generated by coverage.py).
+
+Usage:
+    ./scripts/insights.py              # reuse tokei/cargo test output if crates/ is unchanged
+    ./scripts/insights.py --no-cache   # re-run tokei and cargo test, refreshing the cache
 """
 
+import hashlib
+import json
+import os
 import subprocess
 import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
-def run_cmd(cmd, cwd=None):
-    """Run command and return output."""
-    result = subprocess.run(
-        cmd,
-        shell=True,
-        capture_output=True,
-        text=True,
-        cwd=cwd
-    )
+# tokei and cargo test output, keyed by a fingerprint of the crates/ inputs
+CACHE_DIR = Path('target/insights')
+
+# Coverage total cards in coverage/report.html: label, value and detail
+COVERAGE_CARD_RE = re.compile(
+    r'<div class="label">(Functions|Lines|Regions|Branches)</div>\s*'
+    r'<div class="value [^"]*">([\d.]+)%</div>\s*'
+    r'<div class="detail">(\d+)/(\d+)</div>'
+)
+
+# README badges rewritten by update_readme_badges
+COVERAGE_BADGE_RE = re.compile(r'<img src="https://img\.shields\.io/badge/coverage-[^"]*" alt="coverage">')
+VULN_BADGE_RE = re.compile(r'<img src="https://img\.shields\.io/badge/vulnerabilities-[^"]*" alt="security">')
+LICENSE_BADGE_RE = re.compile(r'<a href="[^"]*"><img src="https://img\.shields\.io/badge/license-[^"]*" alt="license"></a>')
+
+# cargo test / cargo audit output
+RUNNING_UNITTESTS_RE = re.compile(r'Running unittests \S+ \((?:.*[/\\])?(\w+)-[0-9a-f]+(?:\.exe)?\)')
+PASSED_RE = re.compile(r'(\d+) passed')
+TEST_RESULT_RE = re.compile(r'test result:.*?(\d+) passed')
+CARGO_TEST_CMD = ['cargo', 'test', '--workspace', '--lib']
+ANSI_RE = re.compile(r'\x1b\[[0-9;]*m')
+ADVISORIES_RE = re.compile(r'Loaded (\d+) security advisories')
+CRATES_SCANNED_RE = re.compile(r'Scanning.*\((\d+) crate dependencies\)')
+
+def run_cmd(cmd, stderr=subprocess.PIPE):
+    """Run an argv list (no shell) and return its output, or '' if it cannot be started."""
+    try:
+        result = subprocess.run(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=stderr,
+            text=True
+        )
+    except OSError:
+        return ''
     return result.stdout
 
+def stat_fingerprint(digest):
+    """Add the stat of every workspace source file, for trees without git metadata."""
+    paths = [Path('Cargo.toml'), Path('Cargo.lock')]
+    for root, dirs, files in os.walk('crates'):
+        dirs.sort()
+        paths.extend(Path(root) / name for name in sorted(files))
+    for path in paths:
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        digest.update(f'{path}:{stat.st_mtime_ns}:{stat.st_size}'.encode())
+    return digest.hexdigest()
+
+def cache_key():
+    """Fingerprint the workspace sources: HEAD plus the stat of every uncommitted file."""
+    head = run_cmd(['git', 'rev-parse', 'HEAD']).strip()
+    digest = hashlib.sha256(head.encode())
+    if not head:
+        # Not a git checkout (e.g. an exported tree): fall back to the stat of every file
+        return stat_fingerprint(digest)
+    status = run_cmd(['git', 'status', '--porcelain', '--untracked-files=all', '--', 'crates', 'Cargo.toml', 'Cargo.lock'])
+    digest.update(status.encode())
+    for line in status.splitlines():
+        path = Path(line[3:].split(' -> ')[-1])
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        digest.update(f'{path}:{stat.st_mtime_ns}:{stat.st_size}'.encode())
+    return digest.hexdigest()
+
+def load_cache(key):
+    try:
+        return json.loads((CACHE_DIR / f'{key}.json').read_text())
+    except (OSError, ValueError):
+        return {}
+
+def save_cache(key, cache):
+    """Store the command outputs for key, dropping entries for older fingerprints."""
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    for stale in CACHE_DIR.glob('*.json'):
+        stale.unlink()
+    (CACHE_DIR / f'{key}.json').write_text(json.dumps(cache))
+
+def run_cached(cmd, cache):
+    """Run command, reusing its output from cache when the inputs have not changed."""
+    key = ' '.join(cmd)
+    if not cache.get(key):
+        cache[key] = run_cmd(cmd)
+    return cache[key]
+
 def parse_coverage_html():
     """Parse coverage/report.html generated by coverage.py."""
     coverage_path = Path('coverage/report.html')
@@ -34,21 +121,14 @@ def parse_coverage_html():
 
     content = coverage_path.read_text()
 
-    # Parse the total-card divs: value and detail
+    # Parse the total-card divs: value and detail (first card per metric wins)
     metrics = {}
-    for metric in ['Functions', 'Lines', 'Regions', 'Branches']:
-        pattern = (
-            rf'<div class="label">{metric}</div>\s*'
-            rf'<div class="value [^"]*">([\d.]+)%</div>\s*'
-            rf'<div class="detail">(\d+)/(\d+)</div>'
-        )
-        match = re.search(pattern, content)
-        if match:
-            metrics[metric.lower()] = {
-                'percent': float(match.group(1)),
-                'covered': int(match.group(2)),
-                'total': int(match.group(3))
-            }
+    for match in COVERAGE_CARD_RE.finditer(content):
+        metrics.setdefault(match.group(1).lower(), {
+            'percent': float(match.group(2)),
+            'covered': int(match.group(3)),
+            'total': int(match.group(4))
+        })
 
     if len(metrics) < 4:
         return None
@@ -98,41 +178,21 @@ def update_readme_badges(coverage, audit):
         pct = coverage['line']['percent']
         color = coverage_color(pct, exponent=24)
 
-        old_badge_pattern = r'<img src="https://img\.shields\.io/badge/coverage-[^"]*" alt="coverage">'
         new_badge = f'<img src="https://img.shields.io/badge/coverage-{pct:.2f}%25-{color}" alt="coverage">'
-        content = re.sub(old_badge_pattern, new_badge, content)
+        content = COVERAGE_BADGE_RE.sub(new_badge, content)
 
     if audit:
         vuln_count = 0 if audit['clean'] else '?'
         vuln_color = 'brightgreen' if audit['clean'] else 'red'
 
-        old_vuln_pattern = r'<img src="https://img\.shields\.io/badge/vulnerabilities-[^"]*" alt="security">'
         new_vuln = f'<img src="https://img.shields.io/badge/vulnerabilities-{vuln_count}-{vuln_color}" alt="security">'
-        content = re.sub(old_vuln_pattern, new_vuln, content)
+        content = VULN_BADGE_RE.sub(new_vuln, content)
 
-    old_license_pattern = r'<a href="[^"]*"><img src="https://img\.shields\.io/badge/license-[^"]*" alt="license"></a>'
     new_license = '<a href="#license"><img src="https://img.shields.io/badge/license-GPL--3.0--only-blue" alt="license"></a>'
-    content = re.sub(old_license_pattern, new_license, content)
+    content = LICENSE_BADGE_RE.sub(new_license, content)
 
     readme_path.write_text(content)
 
-def parse_tokei_rust(output):
-    for line in output.split('\n'):
-        if line.strip().startswith('Rust'):
-            parts = line.split()
-            if len(parts) >= 6:
-                try:
-                    return {
-                        'files': int(parts[1].replace(',', '')),
-                        'lines': int(parts[2].replace(',', '')),
-                        'code': int(parts[3].replace(',', '')),
-                        'comments': int(parts[4].replace(',', '')),
-                        'blanks': int(parts[5].replace(',', ''))
-                    }
-                except (ValueError, IndexError):
-                    continue
-    return None
-
 def find_crates():
     crates = []
     crates_dir = Path('crates')
@@ -145,42 +205,152 @@ def find_crates():
                     crates.append(subitem)
     return sorted(set(crates))
 
+ASSERT_MACROS = ['assert!', 'assert_eq!', 'debug_assert!', 'debug_assert_eq!']
+
+# assert!/assert_eq! in one scan; a literal-first pattern keeps the regex engine fast
+ASSERT_MACRO_RE = re.compile(rb'assert(_eq)?!')
+
+def count_file_assertions(rust_file):
+    """Count each assertion macro in one file in a single scan over raw bytes (no decode)."""
+    try:
+        with open(rust_file, 'rb') as f:
+            content = f.read()
+    except OSError:
+        return [0] * len(ASSERT_MACROS)
+
+    counts = dict.fromkeys(ASSERT_MACROS, 0)
+    for match in ASSERT_MACRO_RE.finditer(content):
+        base = 'assert_eq!' if match.group(1) else 'assert!'
+        # Counted as substrings, so assert!/assert_eq! include their debug_ variants
+        counts[base] += 1
+        start = match.start()
+        if start >= 6 and content.startswith(b'debug_', start - 6):
+            counts['debug_' + base] += 1
+    return [counts[macro] for macro in ASSERT_MACROS]
+
+def iter_rust_files(path):
+    """Yield the .rs files under path, using the d_type from scandir instead of a stat per entry."""
+    try:
+        entries = list(os.scandir(path))
+    except OSError:
+        return
+    for entry in entries:
+        # Like os.walk, list symlinked files but do not descend into symlinked directories
+        if entry.is_dir():
+            if not entry.is_symlink():
+                yield from iter_rust_files(entry.path)
+        elif entry.name.endswith('.rs'):
+            yield entry.path
+
 def count_assertions(path):
-    counts = {
-        'assert!': 0,
-        'assert_eq!': 0,
-        'debug_assert!': 0,
-        'debug_assert_eq!': 0
-    }
+    counts = dict.fromkeys(ASSERT_MACROS, 0)
+    rust_files = list(iter_rust_files(path))
 
-    for rust_file in Path(path).rglob('*.rs'):
-        try:
-            content = rust_file.read_text()
-            for macro in counts.keys():
-                counts[macro] += content.count(macro)
-        except:
-            pass
+    # File reads release the GIL, so a thread pool overlaps them
+    with ThreadPoolExecutor() as executor:
+        for file_counts in executor.map(count_file_assertions, rust_files):
+            for macro, count in zip(ASSERT_MACROS, file_counts):
+                counts[macro] += count
 
     return counts
 
+LIB_KINDS = {'lib', 'rlib', 'dylib', 'cdylib', 'staticlib', 'proc-macro'}
+
+def find_lib_targets():
+    """Map each workspace crate path to the name of its library test binary."""
+    try:
+        metadata = json.loads(run_cmd(['cargo', 'metadata', '--no-deps', '--format-version', '1']))
+    except ValueError:
+        return {}
+
+    root = Path(metadata['workspace_root'])
+    targets = {}
+    for package in metadata['packages']:
+        crate_path = Path(package['manifest_path']).parent.relative_to(root)
+        for target in package['targets']:
+            if LIB_KINDS.intersection(target['kind']):
+                targets[crate_path] = target['name'].replace('-', '_')
+    return targets
+
+def stream_lines(cmd):
+    """Run an argv list with stderr merged into stdout and yield its output line by line."""
+    try:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    except OSError:
+        return
+    with proc:
+        yield from proc.stdout
+
+def parse_test_output(lines):
+    """Sum passed tests in `cargo test --lib` output and map each library test binary to its count."""
+    total = 0
+    counts = {}
+    binary = None
+    for line in lines:
+        for match in TEST_RESULT_RE.finditer(line):
+            total += int(match.group(1))
+
+        running = RUNNING_UNITTESTS_RE.search(line)
+        if running:
+            binary = running.group(1)
+        elif binary and 'test result:' in line:
+            match = PASSED_RE.search(line)
+            counts[binary] = int(match.group(1)) if match else 0
+            binary = None
+    return total, counts
+
+def cargo_test_counts(cache):
+    """Run the workspace library tests once, parsing the output as it streams in."""
+    key = ' '.join(CARGO_TEST_CMD)
+    cached = cache.get(key)
+    # Like run_cached, a run that produced nothing (e.g. no cargo) is not reused
+    if not isinstance(cached, dict) or not cached['total']:
+        total, counts = parse_test_output(stream_lines(CARGO_TEST_CMD))
+        cached = cache[key] = {'total': total, 'lib': counts}
+    return cached['total'], cached['lib']
+
+def tokei_rust_reports(cmd, cache):
+    """Run tokei with JSON output and return its per-file Rust (path, stats) pairs."""
+    try:
+        data = json.loads(run_cached(cmd + ['--files', '--output', 'json'], cache))
+    except ValueError:
+        return []
+    rust = data.get('Rust') or {}
+    return [(Path(report['name']), report['stats']) for report in rust.get('reports', [])]
+
+# Directories counted as test code rather than production code
+TEST_DIRS = {'tests', 'benches'}
+
+def is_test_path(path):
+    """True for files under a tests/ or benches/ directory."""
+    return not TEST_DIRS.isdisjoint(path.parts[:-1])
+
+def sum_tokei_stats(reports):
+    """Total per-file tokei stats into files, lines, code, comments and blanks."""
+    totals = {'files': len(reports), 'lines': 0, 'code': 0, 'comments': 0, 'blanks': 0}
+    for _, stats in reports:
+        for key in ('code', 'comments', 'blanks'):
+            totals[key] += stats[key]
+            totals['lines'] += stats[key]
+    return totals
+
+def crate_code_lines(reports, crate_path):
+    """Sum code lines of the reports under crate_path (nested crates included)."""
+    depth = len(crate_path.parts)
+    return sum(stats['code'] for path, stats in reports if path.parts[:depth] == crate_path.parts)
+
 def strip_ansi(text):
-    return re.sub(r'\x1b\[[0-9;]*m', '', text)
+    return ANSI_RE.sub('', text)
 
 def run_cargo_audit():
-    result = subprocess.run(
-        "cargo audit 2>&1",
-        shell=True,
-        capture_output=True,
-        text=True
-    )
-    output = strip_ansi(result.stdout + result.stderr)
+    output = strip_ansi(run_cmd(['cargo', 'audit'], stderr=subprocess.STDOUT))
 
     has_vulnerabilities = 'vulnerability' in output.lower() and 'found' in output.lower()
 
-    advisories_match = re.search(r'Loaded (\d+) security advisories', output)
+    advisories_match = ADVISORIES_RE.search(output)
     advisories = int(advisories_match.group(1)) if advisories_match else 0
 
-    crates_match = re.search(r'Scanning.*\((\d+) crate dependencies\)', output)
+    crates_match = CRATES_SCANNED_RE.search(output)
     crates_scanned = int(crates_match.group(1)) if crates_match else 0
 
     return {
@@ -191,6 +361,11 @@ def run_cargo_audit():
 
 
 def main():
+    no_cache = '--no-cache' in sys.argv
+    key = cache_key()
+    # --no-cache re-runs everything and refreshes the stored outputs
+    cache = {} if no_cache else load_cache(key)
+
     lines = []
 
     lines.append("""<picture>
@@ -236,11 +411,12 @@ def main():
     # Code Stats Section
     lines.append("## Code Statistics\n")
 
-    full_output = run_cmd("tokei crates --sort code")
-    full_stats = parse_tokei_rust(full_output)
+    # One tokei walk over crates/, split into production and test files by path
+    reports = tokei_rust_reports(['tokei', 'crates'], cache)
+    prod_reports = [(path, stats) for path, stats in reports if not is_test_path(path)]
 
-    prod_output = run_cmd("tokei crates --sort code --exclude '**/tests/**' --exclude '**/benches/**'")
-    prod_stats = parse_tokei_rust(prod_output)
+    full_stats = sum_tokei_stats(reports) if reports else None
+    prod_stats = sum_tokei_stats(prod_reports) if prod_reports else None
 
     if full_stats and prod_stats:
         test_code = full_stats['code'] - prod_stats['code']
@@ -262,15 +438,7 @@ def main():
     # Test Count Section
     lines.append("## Tests\n")
 
-    test_output = run_cmd("cargo test --workspace --lib 2>&1")
-    test_counts = []
-    for line in test_output.split('\n'):
-        if 'test result:' in line and 'passed' in line:
-            match = re.search(r'(\d+) passed', line)
-            if match:
-                test_counts.append(int(match.group(1)))
-
-    total_tests = sum(test_counts)
+    total_tests, lib_test_counts = cargo_test_counts(cache)
 
     assertions = count_assertions('crates')
     total_assertions = sum(assertions.values())
@@ -302,22 +470,18 @@ def main():
     crates = find_crates()
     crate_stats = []
 
+    # Attribute the workspace test run to crates instead of re-running cargo per crate
+    lib_targets = find_lib_targets()
+
     for crate_path in crates:
         crate_name = str(crate_path).replace('crates/', '')
+        # Per-crate totals come from the same tokei run, grouped by crate path
+        code = crate_code_lines(prod_reports, crate_path)
+        tests = lib_test_counts.get(lib_targets.get(crate_path), 0)
 
-        prod_out = run_cmd(
-            "tokei --exclude '**/tests/**' --exclude '**/benches/**'",
-            cwd=str(crate_path)
-        )
-        prod = parse_tokei_rust(prod_out)
-
-        test_out = run_cmd("cargo test --lib 2>&1", cwd=str(crate_path))
-        matches = re.findall(r'(\d+) passed', test_out)
-        tests = int(matches[-1]) if matches else 0
-
-        if prod and prod['code'] > 0:
-            crate_stats.append((crate_name, prod['code'], tests))
-            lines.append(f"| `{crate_name}` | {prod['code']:,} | {tests} |")
+        if code > 0:
+            crate_stats.append((crate_name, code, tests))
+            lines.append(f"| `{crate_name}` | {code:,} | {tests} |")
 
     if crate_stats:
         total_prod = sum(c[1] for c in crate_stats)
@@ -329,6 +493,8 @@ def main():
     lines.append("---\n")
     lines.append("<p align=\"center\"><sub>Generated with <code>python scripts/insights.py</code></sub></p>")
 
+    save_cache(key, cache)
+
     output = '\n'.join(lines)
     Path('INSIGHTS.md').write_text(output)
     print(f"Generated INSIGHTS.md")
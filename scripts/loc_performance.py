@@ -8,48 +8,56 @@ Example: python3 loc_performance.py 7
 Generates a bar chart showing lines added (green) and removed (red) per day.
 """
 
+import re
 import subprocess
 import sys
+import time
+import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 from pathlib import Path
 import os
 
-def get_loc_for_hours(hours):
-    """Get cumulative LOC stats for the last N hours using LOC.sh."""
+SECONDS_PER_DAY = 24 * 60 * 60
+
+# Totals from a `git log --shortstat` summary line
+INSERTIONS_RE = re.compile(r'(\d+) insertions?\(\+\)')
+DELETIONS_RE = re.compile(r'(\d+) deletions?\(-\)')
+
+def get_loc_per_day(days):
+    """Get (insertions, deletions) for each of the last N days from a single git log.
+
+    Same window as LOC.sh: entry D covers the commits made between D * 24 and
+    (D - 1) * 24 hours ago. Entry 0 is unused.
+    """
     repo_root = Path(__file__).parent.parent
-    loc_script = repo_root / 'LOC.sh'
+    now = time.time()
 
     result = subprocess.run(
-        ['bash', str(loc_script), str(hours)],
+        ['git', 'log', f'--since={days * 24} hours ago', '--shortstat', '--format=@%ct'],
         capture_output=True,
         text=True,
         cwd=repo_root
     )
 
-    # Parse output: "+ <insertions> - <deletions> = <net>"
-    parts = result.stdout.strip().split()
-    if len(parts) >= 4:
-        insertions = int(parts[1]) if parts[1].isdigit() else 0
-        deletions = int(parts[3]) if parts[3].isdigit() else 0
-        return insertions, deletions
-
-    return 0, 0
-
-def get_loc_for_day(day_num):
-    """Get LOC stats for a specific day (day_num days ago)."""
-    # LOC for day D = LOC.sh(D * 24) - LOC.sh((D-1) * 24)
-    hours_start = day_num * 24
-    hours_end = (day_num - 1) * 24
-
-    ins_start, del_start = get_loc_for_hours(hours_start)
-    ins_end, del_end = get_loc_for_hours(hours_end)
-
-    # Delta gives us the changes for that specific day
-    insertions = ins_start - ins_end
-    deletions = del_start - del_end
-
-    return insertions, deletions
+    totals = [[0, 0] for _ in range(days + 1)]
+    day = None
+
+    for line in result.stdout.splitlines():
+        if line.startswith('@'):
+            age = now - int(line[1:])
+            day = int(age // SECONDS_PER_DAY) + 1
+            if age < 0 or day > days:
+                day = None
+        elif day is not None and 'changed' in line:
+            insertions = INSERTIONS_RE.search(line)
+            deletions = DELETIONS_RE.search(line)
+            if insertions:
+                totals[day][0] += int(insertions.group(1))
+            if deletions:
+                totals[day][1] += int(deletions.group(1))
+
+    return totals
 
 def main():
     if len(sys.argv) != 2:
@@ -67,13 +75,15 @@ def main():
         print("Error: days must be >= 1")
         sys.exit(1)
 
+    per_day = get_loc_per_day(days)
+
     # Collect data for each day
     day_labels = []
     additions = []
     removals = []
 
     for day in range(days, 0, -1):
-        adds, dels = get_loc_for_day(day)
+        adds, dels = per_day[day]
         day_labels.append(f"D-{day}")
         additions.append(adds)
         removals.append(dels)
@@ -81,12 +91,12 @@ def main():
     # Create the chart
     fig, ax = plt.subplots(figsize=(max(10, days * 1.2), 6))
 
-    x = range(len(day_labels))
+    x = np.arange(len(day_labels))
     width = 0.35
 
     # Plot bars
-    bars_add = ax.bar([i - width/2 for i in x], additions, width, label='Added', color='green', alpha=0.7)
-    bars_del = ax.bar([i + width/2 for i in x], removals, width, label='Removed', color='red', alpha=0.7)
+    bars_add = ax.bar(x - width/2, additions, width, label='Added', color='green', alpha=0.7)
+    bars_del = ax.bar(x + width/2, removals, width, label='Removed', color='red', alpha=0.7)
 
     # Customize chart
     ax.set_xlabel('Day', fontsize=12, fontweight='bold')
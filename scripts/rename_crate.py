@@ -6,10 +6,36 @@ Usage: python scripts/rename_crate.py <old_name> <new_name>
 Example: python scripts/rename_crate.py memrand redoubt-rand
 """
 
+import os
 import re
 import sys
 from pathlib import Path
-from typing import List, Tuple
+from typing import Dict, List, Tuple
+
+# Directories never touched by a rename
+SKIP_DIRS = {"target", ".git"}
+
+
+def find_files(project_root: Path) -> Dict[str, List[Path]]:
+    """Walk the project once and bucket the files a rename may touch."""
+    found = {"toml": [], "rs": [], "snap": [], "script": []}
+
+    for root, dirs, files in os.walk(project_root):
+        dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+        for name in files:
+            if name == "Cargo.toml":
+                kind = "toml"
+            elif name.endswith(".rs"):
+                kind = "rs"
+            elif name.endswith(".snap"):
+                kind = "snap"
+            elif name.endswith(".sh") or name.startswith("Dockerfile"):
+                kind = "script"
+            else:
+                continue
+            found[kind].append(Path(root) / name)
+
+    return found
 
 
 def rename_crate(old_name: str, new_name: str):
@@ -24,6 +50,22 @@ def rename_crate(old_name: str, new_name: str):
     print(f"   Directory: crates/{old_name} → crates/{new_name_hyphen}")
     print(f"   Imports:   {old_name_underscore}:: → {new_name_underscore}::")
 
+    # Compile the per-file patterns once rather than on every re.sub call.
+    # Each alternation covers one file kind in a single pass; group 1 tells
+    # which branch matched.
+    dependency_re = re.compile(
+        rf'({old_name_underscore}\.workspace)'
+        rf'|{old_name_underscore}\s*=\s*{{\s*path\s*=\s*"[^"]*/{old_name}"'
+    )
+    workspace_dep = f'{new_name_hyphen}.workspace'
+    path_dep = f'{new_name_underscore} = {{ path = "../{new_name_hyphen}"'
+
+    import_re = re.compile(
+        rf'\b(?:(use) {old_name_underscore}::|extern crate {old_name_underscore}\b)'
+    )
+    use_import = f'use {new_name_underscore}::'
+    extern_import = f'extern crate {new_name_underscore}'
+
     # 1. Rename directory
     old_dir = project_root / "crates" / old_name
     new_dir = project_root / "crates" / new_name_hyphen
@@ -68,25 +110,23 @@ def rename_crate(old_name: str, new_name: str):
     workspace_toml.write_text(content)
     print(f"✓ Updated workspace Cargo.toml")
 
+    files = find_files(project_root)
+
     # 4. Update all Cargo.toml files (dependencies)
-    for toml_file in project_root.rglob("Cargo.toml"):
-        if "target" in toml_file.parts or toml_file == workspace_toml:
+    for toml_file in files["toml"]:
+        if toml_file == workspace_toml:
             continue
 
         content = toml_file.read_text()
+        # Every pattern below mentions the old name; skip files that don't
+        if old_name_underscore not in content:
+            continue
         original = content
 
-        # Fix workspace dependencies: old_name.workspace → new-name.workspace
-        content = re.sub(
-            rf'{old_name_underscore}\.workspace',
-            f'{new_name_hyphen}.workspace',
-            content
-        )
-
-        # Fix path dependencies
-        content = re.sub(
-            rf'{old_name_underscore}\s*=\s*{{\s*path\s*=\s*"[^"]*/{old_name}"',
-            f'{new_name_underscore} = {{ path = "../{new_name_hyphen}"',
+        # Fix workspace dependencies (old_name.workspace → new-name.workspace)
+        # and path dependencies
+        content = dependency_re.sub(
+            lambda m: workspace_dep if m.group(1) else path_dep,
             content
         )
 
@@ -96,24 +136,15 @@ def rename_crate(old_name: str, new_name: str):
     print(f"✓ Updated all Cargo.toml dependencies")
 
     # 5. Update Rust source files (.rs)
-    for rs_file in project_root.rglob("*.rs"):
-        if "target" in rs_file.parts:
-            continue
-
+    for rs_file in files["rs"]:
         content = rs_file.read_text()
+        if old_name_underscore not in content:
+            continue
         original = content
 
-        # Replace use statements: use old_name:: → use new_name::
-        content = re.sub(
-            rf'\buse {old_name_underscore}::',
-            f'use {new_name_underscore}::',
-            content
-        )
-
-        # Replace extern crate
-        content = re.sub(
-            rf'\bextern crate {old_name_underscore}\b',
-            f'extern crate {new_name_underscore}',
+        # Replace use statements (use old_name:: → use new_name::) and extern crate
+        content = import_re.sub(
+            lambda m: use_import if m.group(1) else extern_import,
             content
         )
 
@@ -123,11 +154,10 @@ def rename_crate(old_name: str, new_name: str):
     print(f"✓ Updated Rust source files")
 
     # 6. Update snapshots (.snap)
-    for snap_file in project_root.rglob("*.snap"):
-        if "target" in snap_file.parts:
-            continue
-
+    for snap_file in files["snap"]:
         content = snap_file.read_text()
+        if old_name_underscore not in content:
+            continue
         original = content
 
         # Snapshots use underscores
@@ -139,37 +169,22 @@ def rename_crate(old_name: str, new_name: str):
     print(f"✓ Updated snapshot files")
 
     # 7. Update Docker and shell scripts
-    for pattern in ["*.sh", "Dockerfile*"]:
-        for script_file in project_root.rglob(pattern):
-            if "target" in script_file.parts or ".git" in script_file.parts:
+    for script_file in files["script"]:
+        try:
+            content = script_file.read_text()
+            if old_name not in content:
                 continue
+            original = content
+
+            # cargo -p arguments, crates/ paths and generic references all
+            # use hyphens, so a single replace covers every one of them
+            content = content.replace(old_name, new_name_hyphen)
 
-            try:
-                content = script_file.read_text()
-                original = content
-
-                # cargo -p uses hyphens
-                content = re.sub(
-                    rf'\bcargo\s+([a-z-]+\s+)*-p\s+{old_name}\b',
-                    lambda m: m.group(0).replace(old_name, new_name_hyphen),
-                    content
-                )
-
-                # Directory references use hyphens
-                content = re.sub(
-                    rf'crates/{old_name}',
-                    f'crates/{new_name_hyphen}',
-                    content
-                )
-
-                # Generic references (be conservative)
-                content = content.replace(old_name, new_name_hyphen)
-
-                if content != original:
-                    script_file.write_text(content)
-            except UnicodeDecodeError:
-                # Skip binary files
-                pass
+            if content != original:
+                script_file.write_text(content)
+        except UnicodeDecodeError:
+            # Skip binary files
+            pass
 
     print(f"✓ Updated Docker and shell scripts")
 